@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Author: Roman Tolesnikov
+
+Benchmark import time of the driver and loader modules.
+Each module is imported in a fresh interpreter, so the time includes all of its dependencies.
+
+Usage:
+    python bench_import.py [--repeat N] [module ...]
+"""
+
+import sys, subprocess, argparse
+
+_modules = ('conjunction_sat_asteroid', 'outputs', 'screening', 'ephem_cache', 'rerender',
+            'get_esa_ca', 'load_gp_from_spacetrack', 'load_tle_from_archive')
+
+_snippet = 'import time; t = time.perf_counter(); import {}; print(time.perf_counter() - t)'
+
+
+def bench_import(module, repeat=5):
+    '''Return the best of repeat import times of module, s, each in a fresh interpreter'''
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _snippet.format(module)],
+                             capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.split()[-1]))
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark import time of the driver and loader modules')
+    parser.add_argument('modules', nargs='*', default=_modules, help='modules to import, default all')
+    parser.add_argument('--repeat', type=int, default=5, help='number of imports per module, best is reported')
+    args = parser.parse_args(argv)
+
+    print("{:30s} {:>9s}".format("Module", "Import (s)"))
+    for module in args.modules:
+        try:
+            print("{:30s} {:9.3f}".format(module, bench_import(module, args.repeat)))
+        except subprocess.CalledProcessError as e:
+            print("{:30s} {:>9s}  {}".format(module, "failed", e.stderr.strip().splitlines()[-1]))
+
+
+if __name__ == '__main__':
+    main()
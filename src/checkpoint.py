@@ -0,0 +1,166 @@
+"""
+Author: Roman Tolesnikov
+
+Checkpoint of a batch run, so that an interrupted or failed batch resumes from the last completed stage of each flyby.
+
+Usage:
+    checkpoint = Checkpoint(filename)
+    checkpoint.stage(name, [max_age])  -> last completed stage or None
+    checkpoint.failures(name)          -> number of failures since the last completed stage
+    checkpoint.completed(name, stage)
+    checkpoint.failed(name, reason)
+    retry(func, *args, [retries], [backoff], **kwargs)
+Inputs:
+    name: minor body designation
+    stage: one of 'propagated' (result bundle saved) or 'rendered' (outputs written)
+    max_age: optional datetime.timedelta, stages completed longer ago are ignored
+Notes:
+    The checkpoint is a JSON file, rewritten atomically after every update.
+    retry() repeats calls that fail with transient network errors (connection errors, timeouts and HTTP 5xx),
+    with exponential backoff.
+"""
+
+import os, json, time, datetime
+
+import httpx
+import requests
+
+stages = ('propagated', 'rendered')
+
+_transient_errors = (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout, httpx.TransportError)
+
+
+def _is_transient(e):
+    '''Return True for network errors that may succeed when retried'''
+    if isinstance(e, _transient_errors):
+        return True
+    if isinstance(e, (requests.HTTPError, httpx.HTTPStatusError)):
+        return e.response is not None and e.response.status_code >= 500
+    return False
+
+
+class Checkpoint:
+    def __init__(self, filename):
+        self.filename = filename
+        try:
+            with open(filename, 'r') as fp:
+                self.flybys = json.load(fp)
+        except FileNotFoundError:
+            self.flybys = {}
+
+    def __contains__(self, name):
+        return name in self.flybys
+
+    def stage(self, name, max_age=None):
+        '''Return the last completed stage of flyby name, or None if none or completed more than max_age ago'''
+        record = self.flybys.get(name, {})
+        if record.get('stage') is None:
+            return None
+        if max_age is not None and datetime.datetime.utcnow() - datetime.datetime.fromisoformat(record['updated']) > max_age:
+            return None
+        return record['stage']
+
+    def failures(self, name):
+        '''Return the number of failures of flyby name since its last completed stage'''
+        return self.flybys.get(name, {}).get('failures', 0)
+
+    def completed(self, name, stage):
+        '''Record that flyby name completed stage'''
+        if stage not in stages:
+            raise ValueError("Invalid stage: {}".format(stage))
+        self.flybys[name] = {'stage': stage, 'updated': datetime.datetime.utcnow().isoformat()}
+        self._write()
+
+    def failed(self, name, reason):
+        '''Record that flyby name failed after its last completed stage'''
+        record = self.flybys.setdefault(name, {'stage': None})
+        record['failed'] = reason
+        record['failures'] = record.get('failures', 0) + 1
+        record['failed_at'] = datetime.datetime.utcnow().isoformat()
+        self._write()
+
+    def _write(self):
+        tmp_fn = self.filename + '.tmp'
+        with open(tmp_fn, 'w') as fp:
+            json.dump(self.flybys, fp, indent=1, sort_keys=True)
+        os.replace(tmp_fn, self.filename)
+
+
+def retry(func, *args, retries=3, backoff=60, **kwargs):
+    '''Call func(*args, **kwargs), retrying up to retries times on transient network errors.
+       The delay before retry n is backoff * 2**n seconds
+    '''
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if not _is_transient(e) or attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            print("{!r}, retrying in {} sec".format(e, delay))
+            time.sleep(delay)
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as d:
+        fn = os.path.join(d, 'checkpoint.json')
+        checkpoint = Checkpoint(fn)
+        assert checkpoint.stage('2023 BU') is None and '2023 BU' not in checkpoint
+        checkpoint.completed('2023 BU', 'propagated')
+        checkpoint.failed('2023 BU', 'TimeoutError()')
+        checkpoint.failed('2019 MO', 'ValueError()')
+
+        # State survives a restart and a failure keeps the last completed stage
+        checkpoint = Checkpoint(fn)
+        assert checkpoint.stage('2023 BU') == 'propagated'
+        assert checkpoint.flybys['2023 BU']['failures'] == 1
+        assert checkpoint.failures('2023 BU') == 1
+        assert checkpoint.stage('2019 MO') is None and '2019 MO' in checkpoint
+        # Stages older than max_age are ignored, and a failure does not refresh the stage
+        checkpoint.flybys['2023 BU']['updated'] = (datetime.datetime.utcnow() - datetime.timedelta(days=1)).isoformat()
+        checkpoint.failed('2023 BU', 'TimeoutError()')
+        assert checkpoint.stage('2023 BU', max_age=datetime.timedelta(hours=12)) is None
+        assert checkpoint.stage('2023 BU') == 'propagated'
+        checkpoint.completed('2023 BU', 'rendered')
+        assert 'failed' not in Checkpoint(fn).flybys['2023 BU']
+        assert checkpoint.failures('2023 BU') == 0
+        assert checkpoint.stage('2023 BU', max_age=datetime.timedelta(hours=12)) == 'rendered'
+
+        try:
+            checkpoint.completed('2023 BU', 'done')
+        except ValueError as e:
+            assert str(e) == "Invalid stage: done"
+        else:
+            raise AssertionError("Failed exception check")
+
+    calls = []
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise requests.ConnectionError("reset")
+        return 'ok'
+    assert retry(flaky, backoff=0) == 'ok' and len(calls) == 3
+
+    def http_error(status_code):
+        response = requests.Response()
+        response.status_code = status_code
+        return requests.HTTPError(response=response)
+    assert _is_transient(http_error(503)) and not _is_transient(http_error(404))
+    assert _is_transient(httpx.ConnectTimeout("timeout"))
+    request = httpx.Request('GET', 'https://www.space-track.org')
+    assert _is_transient(httpx.HTTPStatusError("", request=request, response=httpx.Response(502, request=request)))
+    assert not _is_transient(httpx.HTTPStatusError("", request=request, response=httpx.Response(401, request=request)))
+
+    calls.clear()
+    def broken():
+        calls.append(1)
+        raise ValueError("Horizons Error")
+    try:
+        retry(broken, backoff=0)
+    except ValueError:
+        assert len(calls) == 1
+    else:
+        raise AssertionError("Non-transient errors must not be retried")
+    print("PASS!")
@@ -1,38 +1,43 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import io, os, re, glob, json
+import io, os, re, json, argparse
 from sys import stdout
 
-from itertools import islice
 from pprint import pprint
 from warnings import warn
 import time, datetime
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from astropy import units as u
 from astropy.time import Time, TimeDelta
-from astropy.coordinates import CartesianRepresentation, CartesianDifferential
-from astropy.coordinates import TEME, GCRS
-
-from poliastro.ephem import Ephem
-from poliastro.frames import Planes
-from poliastro.util import norm, time_range
-from poliastro.bodies import Earth
-from poliastro.plotting import OrbitPlotter3D
 
 from sgp4.api import Satrec, SatrecArray
 
-from astroquery.jplhorizons import Horizons
+# astropy.coordinates, poliastro, astroquery and matplotlib are imported where used,
+# so that importing this module to reuse e.g. ephem_from_gp stays fast
 
 import get_esa_ca
+from checkpoint import Checkpoint, retry
+from screening import n_reported, MissDistances, sample_state_offsets, sampled_dispersions, sampled_miss_distances
+from ephem_cache import EphemCache
+from outputs import make_text_output, make_html_output, make_json_output, make_plots, make_index
 
 # Radius of geosynchronous orbit + 10%
 Rgeo = 42_164 * 1.1 # km,  From https://en.wikipedia.org/wiki/Geosynchronous_orbit
 # Directory where output docs are stored
 base_dir = '../docs'
+# Directory where per-flyby result bundles are stored, see rerender.py
+results_dir = '../results'
+# Checkpoint of the batch run, see checkpoint.py
+checkpoint_fn = results_dir + '/checkpoint.json'
+# Upcoming flybys are recomputed with the latest element sets unless processed within this time
+upcoming_max_age = datetime.timedelta(hours = 12)
+# Flybys that failed this many times in a row are skipped, unless --retry-failed is given
+max_failures = 3
+# Directory where propagated satellite positions are cached
+cache_dir = '../cache'
 
 def print_sat(sat, name):
     """Prints Satrec object in convenient form."""
@@ -44,7 +49,7 @@ def from_horizons_rt(
         epochs,
         *,
         attractor=None,
-        plane=Planes.EARTH_EQUATOR,
+        plane=None,
         id_type=None,
     ):
         """
@@ -64,11 +69,17 @@ def from_horizons_rt(
             Body to use as central location,
             if not given the Solar System Barycenter will be used.
         plane : ~poliastro.frames.Planes, optional
-            Fundamental plane of the frame, default to Earth Equator.
+            Fundamental plane of the frame, default (None) to Earth Equator.
         id_type : NoneType or str, optional
             Use "smallbody" for Asteroids and Comets and None (default) to first
             search for Planets and Satellites.
         """
+        from astropy.coordinates import CartesianRepresentation, CartesianDifferential
+        from poliastro.frames import Planes
+        from astroquery.jplhorizons import Horizons
+
+        if plane is None:
+            plane = Planes.EARTH_EQUATOR
         if epochs.isscalar:
             epochs = epochs.reshape(1)
 
@@ -119,12 +130,19 @@ def from_horizons_rt(
         )
         return cls(coordinates, epochs, plane), obj
 
-def process_asteroid(target_name, TCA, time_position = 'mid'):
+def process_asteroid(target_name, TCA, time_position = 'mid', n_samples = 0, state_cov = None, sigma_r = 0.0, sigma_v = 0.0, seed = None,
+                     reduced_precision = False):
     '''
     Target Name: minor body designation in the form '2023 BU'. Space is required. Numbered objects are accepted as well. MPC packed designators are not supported
     TCA: Time of Close Approach: astropy.Time() object that defines the time of close approach. Designed to be obtained from a pre-computed ephemeris, like that from ESA CNEOS
+    n_samples: number of asteroid trajectories sampled around the nominal one. 0 (default) disables Monte Carlo screening
+    state_cov: 6x6 asteroid position/velocity covariance at the close approach, km and km/s. If not given, isotropic sigma_r (km) and sigma_v (km/s) are used
+    reduced_precision: screen all objects with float32 positions and ranges, and refine the reported objects from the float64 positions
     '''
-    
+    from poliastro.ephem import Ephem
+    from poliastro.util import time_range
+    from poliastro.bodies import Earth
+
     search_range = TimeDelta(2 *u.day)
     if time_position == 'mid':
         # Use this for a fly-by close approach
@@ -215,173 +233,59 @@ def process_asteroid(target_name, TCA, time_position = 'mid'):
 
     print("{} element sets remaining after apogee vs miss distance filtering".format(len(sat_list)))
 
-    start_time = time.time()
-    # Generate ephemeris for the sattelites using accelelrated array
-    temp = SatrecArray(sat_list)
-    #a = SatrecArray([sat_list[0], sat_list[1]])
-
-    sat_ephem_list2 = ephem_from_gp(temp, epochs_fine)
-    end_time = time.time()
-
-    print("Propagated {} elsets for {} epochs in {:.2f} sec: {:.3f} ms/el-epoch".format(
-          len(sat_list), len(epochs_fine), end_time - start_time, (end_time - start_time)*1000/(len(sat_list)*len(epochs_fine))))
-
+    # Re-use positions propagated for the same element sets and epochs by a previous run
+    cache = EphemCache(cache_dir)
+    cache_key = cache.key(sat_list, epochs_fine)
+    sat_r = cache.get(cache_key)
+    if sat_r is not None:
+        print("Loaded {} elsets for {} epochs from cache".format(len(sat_list), len(epochs_fine)))
+    else:
+        start_time = time.time()
+        # Generate ephemeris for the sattelites using accelelrated array
+        sat_r = cache.put(cache_key, gcrs_positions_from_gp(SatrecArray(sat_list), epochs_fine))
+        end_time = time.time()
+
+        print("Propagated {} elsets for {} epochs in {:.2f} sec: {:.3f} ms/el-epoch".format(
+              len(sat_list), len(epochs_fine), end_time - start_time, (end_time - start_time)*1000/(len(sat_list)*len(epochs_fine))))
+
+    if reduced_precision:
+        # Bulk screening reads a float32 copy cached next to the float64 positions, which are kept for refinement
+        cache_key_32 = cache.key(sat_list, epochs_fine, np.float32)
+        screen_r = cache.get(cache_key_32)
+        if screen_r is None:
+            screen_r = cache.put(cache_key_32, sat_r.astype(np.float32))
+    else:
+        screen_r = sat_r
 
     # calculate Range between each sat and the asteroid target
-    min_range_list = []
-    for i_ephem, i_sat in zip(sat_ephem_list2, sat_list):
-        t = norm(i_ephem.rv()[0] - target_fine.rv()[0], axis = 1)
-        min_idx = np.argmin(t)
-        min_range_list.append((i_sat, t[min_idx], epochs_fine[min_idx].iso))
-
-    # Sort by range
-    min_range_list.sort(key=lambda a: a[1])
-    return (min_range_list, map_satnum_to_name, sat_ephem_list2, sat_list, epochs_fine, target_fine)
-    
-def make_text_output(min_range_list,map_satnum_to_name):        
-    # Report closest misses
-    header_active = "{:>2s} {:>9s} {:10s} {:25s} {}  {}".format("No", "NORAD", "INTER", "Satellite Name", "Miss (km)", "Time of Closest Approach (UTC)")
-    header_debris = "{:>2s} {:>9s} {:10s} {:25s} {}  {}".format("No", "NORAD", "INTER", "Satellite Name (debris)", "Miss (km)", "Time of Closest Approach (UTC)")
-    deb_cnt = 0
-    active_cnt = 0
-    deb_list = []
-    active_list = []
-    for i_sat, miss_dist,TCA in min_range_list:
-        name = map_satnum_to_name[i_sat.satnum]
-        if (name.endswith('DEB') or name.endswith('AKM') or ' DEB ' in name or 'R/B' in name or 'PKM' in name or name.startswith('WESTFORD NEEDLES') or name == 'TBA - TO BE ASSIGNED'):
-            deb_cnt += 1
-            if deb_cnt <= 20:
-                deb_list.append("{:2d} {:9d} {:10s} {:25s} {:9.0f}  {}".format(deb_cnt, i_sat.satnum, i_sat.intldesg, name, miss_dist.value, TCA))
-        else:
-            active_cnt += 1
-            if active_cnt <= 20:
-                active_list.append("{:2d} {:9d} {:10s} {:25s} {:9.0f}  {}".format(active_cnt, i_sat.satnum, i_sat.intldesg, name, miss_dist.value, TCA))
-        if deb_cnt > 20 and active_cnt > 20:
-            break
-
-    print(header_active)
-    print('\n'.join(active_list))
-
-    print("\n" + header_debris)
-    print('\n'.join(deb_list))
-        
-def make_html_output(min_range_list,map_satnum_to_name,target_name,filename):
-    # Report closest misses
-    html_head = '<html>\n<head>\n<title>{} conjunctions</title>\n'.format(target_name)
-    html_head +='  <link rel="stylesheet" href="styles.css">\n</head>'
-
-    table_tag_active = "<table>\n<caption> Close Approaches with non-debris for {} </caption>\n".format(target_name)
-    table_tag_debris = "<table>\n<caption> Close Approaches with debris for {} </caption>\n".format(target_name)
-    header_row = "<tr> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th>  <th>{}</th> </tr>\n".format("No", "NORAD", "INTER", "Satellite Name", "Miss (km)", "Time of Closest Approach (UTC)")
-    deb_cnt = 0
-    active_cnt = 0
-    deb_list = []
-    active_list = []
-    for i_sat, miss_dist,TCA in min_range_list:
-        name = map_satnum_to_name[i_sat.satnum]
-        if (name.endswith('DEB') or name.endswith('AKM') or ' DEB ' in name or 'R/B' in name or 'PKM' in name or name.startswith('WESTFORD NEEDLES') or name == 'TBA - TO BE ASSIGNED'):
-            deb_cnt += 1
-            if deb_cnt <= 20:
-                deb_list.append("<tr> <td>{:d}</td> <td>{:d}</td> <td>{}</td> <td>{}</td> <td>{:.0f}</td> <td>{}</td> </tr>".format(deb_cnt, i_sat.satnum, i_sat.intldesg, name, miss_dist.value, TCA))
-        else:
-            active_cnt += 1
-            if active_cnt <= 20:
-                active_list.append("<tr> <td>{:d}</td> <td>{:d}</td> <td>{}</td> <td>{}</td> <td>{:.0f}</td> <td>{}</td> </tr>".format(active_cnt, i_sat.satnum, i_sat.intldesg, name, miss_dist.value, TCA))
-        if deb_cnt > 20 and active_cnt > 20:
-            break
-
-    with open(filename, "w") as f:
-        f.write(html_head)
-        f.write(table_tag_active)
-        f.write(header_row)
-        f.write('\n'.join(active_list))
-        f.write('\n</table>\n')
-
-        f.write(table_tag_debris)
-        f.write(header_row)
-        f.write('\n'.join(deb_list))
-        f.write('\n</table>\n')
-        f.write('<img src="{}.png"'.format(target_name))
-        f.write('</html>\n')
-
-def make_json_output(min_range_list,map_satnum_to_name,target_name,filename, flyby_type):
-    t=[]
-    t.append(target_name) # asteroid name
-    t.append(map_satnum_to_name[min_range_list[0][0].satnum]) # CA sat name
-    t.append('{:.0f}'.format(min_range_list[0][1].value)) # CA sat miss distance (km)
-    t.append(min_range_list[0][2][:16]) # CA sat Time of close aproach
-    t.append(flyby_type)
-    
-    with open(filename,"w") as f:
-        f.write(json.dumps(t))
-
-def make_index(base_dir):
-    html_head = '<html>\n<head>\n<title>Asteroid-Satellite Conjunction Assessment</title>\n'
-    html_head +='  <link rel="stylesheet" href="styles.css">\n</head>'
-
-    ca_list = []
-    for j in glob.glob(base_dir + "/*.json"):
-        with open(j, 'r') as jf:
-            ca_record = json.loads(jf.read())
-            # Add hyperlink
-            ca_record[0] = '<a href="{}.html">'.format(ca_record[0]) + ca_record[0] + '</a>'
-            ca_list.append(ca_record)
-    ca_list.sort(key = lambda a: a[3], reverse = True) # sort by CA date
-    
-    with open(base_dir + "/index.html",'w') as idxf:
-        idxf.write(html_head)
-        idxf.write("<body>\n<table>\n")
-        idxf.write("<tr> <th>Minor Body</th> <th>Satellite</th> <th>Miss (km)</th> <th>Time of Closest Approach (UTC)</th> <th> Flyby Type </th> </tr>\n")
-        for ca in ca_list:
-            row = ''.join(['<td>{}</td>'.format(i) for i in ca])
-            row = '<tr>' + row + '</tr>\n'
-            idxf.write(row)
-        idxf.write("</table>\n")
-        idxf.write("<div>Last Updated: {} UTC</div>".format(datetime.datetime.utcnow().isoformat()))
-        idxf.write("</body>\n")
-        idxf.write("</html>\n")
-            
-def make_plots(target_name, min_range_list, sat_ephem_list2, sat_list, epochs_fine, target_fine, filename):   
-    # Plot separations between each sat and the target
-    fig, ax = plt.subplots()
-
-    # Label 5 sats that have closest misses
-    sat_to_label = [i[0].satnum for i in islice(min_range_list,5)]
-
-    for i_ephem, i_sat in zip(sat_ephem_list2, sat_list):
-        if i_sat.satnum in sat_to_label:
-            ax.plot(norm(i_ephem.rv()[0] - target_fine.rv()[0], axis = 1), label = map_satnum_to_name[i_sat.satnum])
-        else:
-            ax.plot(norm(i_ephem.rv()[0] - target_fine.rv()[0], axis = 1))
-    # plot erth radius
-    #ax.plot([0, len(epochs_fine)],[sat_list[0].radiusearthkm,sat_list[0].radiusearthkm], '--', label = 'Re', )
-
-    # plot asteroid distance from earth center:
-    #ax.plot(target_raw_fine['range'] << u.km, label = target_name + " range from Earth center" )
-
-    ax.set_yscale('log')
-    ax.set_xlabel('Time [UTC]')
-    ax.set_ylabel('Miss Distance [km]')
-    ax.set_title("Miss distance sat - {}".format(target_name))
-    ax.set_xticks(range(0,len(epochs_fine),10),
-                 labels = [epochs_fine.iso[i][0:16] for i in range(0,len(epochs_fine),10)], rotation = 90, minor = False)
-    ax.legend(bbox_to_anchor=(1.05, 1),loc='upper left',)
-    plt.savefig(filename, format='png', transparent = True, bbox_inches = 'tight')  
-
-    if 0:
-        plotter = OrbitPlotter3D()
-        plotter.set_attractor(Earth)
-
-        for i_ephem, i_sat in zip(sat_ephem_list2, sat_list):
-            if i_sat.satnum in sat_to_label:
-                plotter.plot_ephem(
-                    i_ephem, color="#666", label=map_satnum_to_name[i_sat.satnum], trail=True
-                )
-
-        plotter.plot_ephem(target_fine, color = "#345", label = '2023 BU', trail = True)
-        plotter.show()
-
-def ephem_from_gp(sat, times):
+    target_r = target_fine.rv()[0].to_value(u.km)
+    rel_r = screen_r - target_r.astype(screen_r.dtype)
+    range_km = np.linalg.norm(rel_r, axis = -1)
+
+    result = MissDistances.from_ranges([i.satnum for i in sat_list],
+                                       [i.intldesg for i in sat_list],
+                                       [map_satnum_to_name[i.satnum] for i in sat_list],
+                                       range_km, epochs_fine)
+
+    if reduced_precision:
+        # Refine ranges of the candidates for the reported objects from the float64 positions
+        idx = result.candidates(n_reported)
+        result.refine(idx, np.linalg.norm(sat_r[idx] - target_r, axis = -1))
+        print("Refined {} of {} elsets in float64".format(len(idx), len(sat_list)))
+
+    if n_samples > 0:
+        # Disperse the asteroid state at the close approach and evaluate all samples against the same propagation
+        start_time = time.time()
+        offsets = sample_state_offsets(n_samples, cov = state_cov, sigma_r = sigma_r, sigma_v = sigma_v, seed = seed)
+        dt_s = (epochs_fine - epochs_fine[ICA_fine]).to_value(u.s)
+        r0 = target_r[ICA_fine]
+        v0 = target_fine.rv()[1][ICA_fine].to_value(u.km / u.s)
+        result.samples_km = sampled_miss_distances(rel_r, sampled_dispersions(r0, v0, dt_s, offsets))
+        end_time = time.time()
+        print("Evaluated {} asteroid samples against {} elsets in {:.2f} sec".format(n_samples, len(sat_list), end_time - start_time))
+    return (result, sat_r, target_fine)
+
+def _sgp4_from_gp(sat, times):
     if isinstance(sat,SatrecArray):
         errors, rs, vs = sat.sgp4(times.jd1, times.jd2)
     else:
@@ -398,7 +302,26 @@ def ephem_from_gp(sat, times):
             if not( errors[i] == 0).all():
                 # this porpagation has an error. Print some details:
                 print ("Error idx = ", i)
-                
+    return rs, vs
+
+def gcrs_positions_from_gp(sat, times):
+    '''Return GCRS positions, km, as (N, T, 3) array for SatrecArray or (T, 3) array for Satrec'''
+    from astropy.coordinates import CartesianRepresentation, TEME, GCRS
+
+    rs, vs = _sgp4_from_gp(sat, times)
+    cart_gcrs = (
+        TEME(CartesianRepresentation(rs << u.km, xyz_axis=-1), obstime=times)
+        .transform_to(GCRS(obstime=times))
+        .cartesian
+    )
+    return np.moveaxis(cart_gcrs.xyz.to_value(u.km), 0, -1)
+
+def ephem_from_gp(sat, times):
+    from astropy.coordinates import CartesianRepresentation, CartesianDifferential, TEME, GCRS
+    from poliastro.ephem import Ephem
+    from poliastro.frames import Planes
+
+    rs, vs = _sgp4_from_gp(sat, times)
     cart_teme = CartesianRepresentation(
         rs << u.km,
         xyz_axis=-1,
@@ -417,32 +340,91 @@ def ephem_from_gp(sat, times):
     else:
         return Ephem(cart_gcrs, times, plane=Planes.EARTH_EQUATOR)
 
-try:
-    for data_type in ('upcoming', 'recent', 'impacted'):
-        t = get_esa_ca.get_esa_data(data_type, Rgeo)
-        for (name, TCA, miss_dist) in t:
-            try:
+def process_flyby(norm_name, TCA, data_type, checkpoint, stage = None, **options):
+    '''Process one flyby from its last completed stage and write all outputs.
+       stage: last completed stage from checkpoint, the flyby is rendered from its saved bundle if 'propagated'
+       options: passed to process_asteroid
+    '''
+    out_fn = base_dir + '/{}.html'.format(norm_name)
+    bundle_fn = results_dir + '/{}.npz'.format(norm_name)
+    sat_r = target_fine = None
+    if stage == 'propagated' and os.path.exists(bundle_fn):
+        print("Resuming rendering of " + norm_name)
+        result, metadata = MissDistances.load(bundle_fn)
+    else:
+        print("Processing " + norm_name)
+        if data_type == 'impacted':
+            time_position = 'end'
+        else:
+            time_position = 'mid'
+        (result, sat_r, target_fine) = retry(process_asteroid, norm_name, Time(TCA), time_position = time_position, **options)
+        result.save(bundle_fn, target_name = norm_name, flyby_type = data_type)
+        checkpoint.completed(norm_name, 'propagated')
+    make_text_output(result)
+    make_html_output(result,norm_name,out_fn)
+    make_json_output(result,norm_name,base_dir + '/{}.json'.format(norm_name), data_type)
+    make_plots(norm_name, result, base_dir + '/{}.png'.format(norm_name), sat_r, target_fine)
+    checkpoint.completed(norm_name, 'rendered')
+    print("Completed " + norm_name)
+
+def _non_negative(value):
+    '''argparse type of a non-negative float'''
+    x = float(value)
+    if x < 0:
+        raise argparse.ArgumentTypeError("must not be negative, got {}".format(value))
+    return x
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Screen close asteroid flybys from ESA NEOCC against the satellite catalog')
+    parser.add_argument('--samples', type = int, default = 0,
+                        help = 'number of sampled asteroid trajectories for Monte Carlo screening, default 0 (off)')
+    parser.add_argument('--sigma-r', type = _non_negative, default = 0.0, help = 'asteroid position dispersion at the close approach, km')
+    parser.add_argument('--sigma-v', type = _non_negative, default = 0.0, help = 'asteroid velocity dispersion at the close approach, km/s')
+    parser.add_argument('--seed', type = int, default = None, help = 'random seed for the sampled trajectories')
+    parser.add_argument('--reduced-precision', action = 'store_true',
+                        help = 'screen in float32 and refine the reported objects in float64')
+    parser.add_argument('--retry-failed', action = 'store_true',
+                        help = 'process flybys that failed {} times in a row again'.format(max_failures))
+    args = parser.parse_args(argv)
+    options = {'n_samples': args.samples, 'sigma_r': args.sigma_r, 'sigma_v': args.sigma_v, 'seed': args.seed,
+               'reduced_precision': args.reduced_precision}
+    if args.samples > 0 and args.sigma_r == 0 and args.sigma_v == 0:
+        parser.error('--samples requires a positive --sigma-r or --sigma-v')
+
+    os.makedirs(results_dir, exist_ok = True)
+    checkpoint = Checkpoint(checkpoint_fn)
+    try:
+        for data_type in ('upcoming', 'recent', 'impacted'):
+            t = retry(get_esa_ca.get_esa_data, data_type, Rgeo)
+            for (name, TCA, miss_dist) in t:
                 norm_name = get_esa_ca.normalize_esa_name(name)
-                out_fn = base_dir + '/{}.html'.format(norm_name)
-                if os.path.exists(out_fn) and data_type != 'upcoming':
-                    # future close approaches are always recamputed
-                    print("Skipped previously computed " + norm_name)
-                elif data_type == 'upcoming' and Time(TCA) - Time.now() > TimeDelta(7 * u.day):
-                    print("Skipped flyby that's too far in the future " + norm_name)
-                else:
-                    print("Processing " + norm_name)
-                    if data_type == 'impacted':
-                        time_position = 'end'
+                try:
+                    out_fn = base_dir + '/{}.html'.format(norm_name)
+                    # future close approaches are recamputed unless processed recently
+                    stage = checkpoint.stage(norm_name, max_age = upcoming_max_age if data_type == 'upcoming' else None)
+                    if stage == 'rendered':
+                        print("Skipped previously computed " + norm_name)
+                    elif norm_name not in checkpoint and os.path.exists(out_fn) and data_type != 'upcoming':
+                        # Processed before checkpoints were kept
+                        print("Skipped previously computed " + norm_name)
+                    elif data_type == 'upcoming' and Time(TCA) - Time.now() > TimeDelta(7 * u.day):
+                        print("Skipped flyby that's too far in the future " + norm_name)
+                    elif checkpoint.failures(norm_name) >= max_failures and not args.retry_failed:
+                        print("Skipped flyby that failed {} times: {} {}".format(
+                              checkpoint.failures(norm_name), norm_name, checkpoint.flybys[norm_name]['failed']))
                     else:
-                        time_position = 'mid'
-                    (min_range_list, map_satnum_to_name, sat_ephem_list2, sat_list, epochs_fine, target_fine) = process_asteroid(norm_name, Time(TCA), time_position = time_position)
-                    make_text_output(min_range_list, map_satnum_to_name)
-                    make_html_output(min_range_list, map_satnum_to_name,norm_name,out_fn)
-                    make_json_output(min_range_list,map_satnum_to_name,norm_name,base_dir + '/{}.json'.format(norm_name), data_type)
-                    make_plots(norm_name, min_range_list, sat_ephem_list2, sat_list, epochs_fine, target_fine,  base_dir + '/{}.png'.format(norm_name))
-                    print("Completed " + norm_name)
-            except ValueError as e:
-                print(e)
-finally:
-    make_index(base_dir)
-    
\ No newline at end of file
+                        process_flyby(norm_name, TCA, data_type, checkpoint, stage, **options)
+                except Exception as e:
+                    # Record the failure and continue with the next flyby
+                    print("Failed {}: {!r}".format(norm_name, e))
+                    checkpoint.failed(norm_name, repr(e))
+    finally:
+        make_index(base_dir)
+        failed = [name for name in checkpoint.flybys if checkpoint.failures(name) > 0]
+        if failed:
+            print("Failed flybys:")
+            for name in failed:
+                print("  {} ({} failures): {}".format(name, checkpoint.failures(name), checkpoint.flybys[name]['failed']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Author: Roman Tolesnikov
+
+On-disk cache of propagated satellite positions.
+
+Usage:
+    cache = EphemCache(cache_dir, [max_bytes])
+    key = cache.key(sat_list, epochs)
+    positions = cache.get(key)
+    if positions is None:
+        positions = cache.put(key, propagate(sat_list, epochs))
+Inputs:
+    sat_list: list of sgp4 Satrec objects that represent the catalog snapshot
+    epochs: astropy Time array of the propagation epochs
+    positions: (N, T, 3) numpy array
+Notes:
+    Entries are stored as .npy files named by the key and returned memory-mapped.
+    The key covers the element sets, the epoch grid and the array dtype, so any change to either re-propagates.
+    When the cache grows beyond max_bytes, the least recently used entries are removed.
+
+  $ pip install numpy
+"""
+
+import os, glob, hashlib
+
+import numpy as np
+
+# Satrec attributes that fully define the propagation of an element set
+_elset_attrs = ('satnum', 'jdsatepoch', 'jdsatepochF', 'bstar', 'ndot', 'nddot',
+                'inclo', 'nodeo', 'ecco', 'argpo', 'mo', 'no_kozai')
+
+
+class EphemCache:
+    def __init__(self, cache_dir, max_bytes=4 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(sat_list, times, dtype=np.float64):
+        '''Return the cache key for the catalog snapshot sat_list propagated at times'''
+        h = hashlib.sha256()
+        elsets = np.array([[getattr(sat, a) for a in _elset_attrs] for sat in sat_list], dtype=np.float64)
+        h.update(elsets.tobytes())
+        h.update(np.ascontiguousarray(times.jd1, dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(times.jd2, dtype=np.float64).tobytes())
+        h.update(np.dtype(dtype).str.encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    def get(self, key):
+        '''Return memory-mapped positions stored under key, or None if not cached'''
+        path = self._path(key)
+        try:
+            positions = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+        # Mark as recently used
+        os.utime(path)
+        return positions
+
+    def put(self, key, positions):
+        '''Store positions under key, evict least recently used entries and return positions'''
+        path = self._path(key)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as fp:
+            np.save(fp, positions)
+        os.replace(tmp_path, path)
+        self._evict()
+        return positions
+
+    def _evict(self):
+        entries = [(os.path.getmtime(f), os.path.getsize(f), f) for f in glob.glob(os.path.join(self.cache_dir, '*.npy'))]
+        entries.sort(reverse=True)
+        total = 0
+        for (mtime, size, f) in entries:
+            total += size
+            # Always keep the most recent entry
+            if total > self.max_bytes and f != entries[0][2]:
+                try:
+                    os.remove(f)
+                except OSError:
+                    # Still memory-mapped on Windows, leave for the next eviction
+                    pass
+
+
+if __name__ == '__main__':
+    import tempfile
+    from astropy import units as u
+    from astropy.time import Time
+    from sgp4.api import Satrec
+
+    s1 = '1 25544U 98067A   23027.50000000  .00016717  00000-0  10270-3 0  9005'
+    s2 = '2 25544  51.6400 208.9163 0006317  69.9862  25.2906 15.50377579 28490'
+    sat_list = [Satrec.twoline2rv(s1, s2)]
+    epochs = Time('2023-01-27') + np.arange(10) * u.min
+
+    with tempfile.TemporaryDirectory() as d:
+        cache = EphemCache(d, max_bytes=1000)
+        k = cache.key(sat_list, epochs)
+        assert k == cache.key(sat_list, epochs)
+        assert k != cache.key(sat_list, epochs[1:])
+        assert k != cache.key(sat_list, epochs, np.float32)
+        assert cache.get(k) is None
+        a = np.arange(30, dtype=float).reshape(1, 10, 3)
+        cache.put(k, a)
+        assert (cache.get(k) == a).all()
+        # Second entry exceeds the size bound and evicts the first
+        k2 = cache.key(sat_list, epochs[1:])
+        cache.put(k2, np.zeros((1, 50, 3)))
+        assert cache.get(k) is None
+        assert cache.get(k2) is not None
+    print("PASS!")
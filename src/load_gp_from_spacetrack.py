@@ -6,7 +6,7 @@ Call load_gp_from_spacetrack(name_map) from an iterator
  -- name_map is a dictional name to be udpated with 'satnum' as key and 'Object Name' as value
  -- returns SatRec at every iteration
 
-space-track.org credentials can be either in
+space-track.org credentials are read on first use and can be either in
 - environment 
   * SPACETRACK_USER=<USER>
   * SPACETRACK_PASSWD=<PWD>
@@ -24,13 +24,32 @@ import sys, os, io
 
 import configparser
 
-import spacetrack.operators as op
-from spacetrack import SpaceTrackClient
-
 from sgp4 import omm
 from sgp4.api import Satrec
 
+_credentials = None
+
+def _get_credentials():
+    '''Return (user, password) for space-track.org, resolved on the first call'''
+    global _credentials
+    if _credentials is None:
+        try:
+            # See if environment contains credentials. This is the case for github deployments
+            _credentials = (os.environ['SPACETRACK_USER'], os.environ['SPACETRACK_PASSWD'])
+        except:
+            try:
+                # See if the credentials file exists. This is the case for local repositories
+                config = configparser.ConfigParser()
+                config.read("space-track.ini")
+                _credentials = (config.get("configuration","username"), config.get("configuration","password"))
+            except:
+                raise ValueError("Unable to obtain space-track.org credentials")
+    return _credentials
+
 def _segments_from_space_track():
+    from spacetrack import SpaceTrackClient
+
+    configUsr, configPwd = _get_credentials()
     st = SpaceTrackClient(identity=configUsr, password=configPwd)
     data = st.gp(epoch='>now-30', format='xml')
     with open('omm_latest.xml', 'w') as fp:
@@ -52,20 +71,6 @@ def load_gp_from_spacetrack(name_map):
 
         yield sat
 
-try:
-    # See if environment contains credentials. This is the case for github deployments
-    configUsr = os.environ['SPACETRACK_USER']
-    configPwd = os.environ['SPACETRACK_PASSWD']
-except:
-    try:
-        # See if the credentials file exists. This is the case for local repositories
-        config = configparser.ConfigParser()
-        config.read("space-track.ini")
-        configUsr = config.get("configuration","username")
-        configPwd = config.get("configuration","password")
-    except:
-        raise ValueError("Unable to obtain space-track.org credentials")
-       
 if __name__ == '__main__':
     sat_list = []
     map_satnum_to_name = {}
@@ -0,0 +1,178 @@
+"""
+Author: Roman Tolesnikov
+
+Text, HTML, JSON and plot outputs of the conjunction screening.
+
+Usage:
+    make_text_output(result)
+    make_html_output(result, target_name, filename)
+    make_json_output(result, target_name, filename, flyby_type)
+    make_plots(target_name, result, filename, [sat_r, target_fine, plot_3d, n_tracks])
+    make_index(base_dir)
+Inputs:
+    result: screening.MissDistances, either from process_asteroid or loaded from a saved bundle
+    sat_r, target_fine: satellite positions and asteroid Ephem, only needed for the 3D plot
+    plot_3d: show interactive 3D plot of the closest objects, default False
+    n_tracks: number of closest objects whose range is plotted, default screening.max_tracks, the number saved in bundles
+Notes:
+    Text and HTML outputs list the screening.n_reported closest objects of each class.
+    matplotlib is imported only when plotting, and poliastro (with plotly) only for the 3D plot
+"""
+
+import glob, json, datetime
+
+from screening import max_tracks, n_reported
+
+def make_text_output(result):
+    # Report closest misses
+    header_active = "{:>2s} {:>9s} {:10s} {:25s} {}  {}".format("No", "NORAD", "INTER", "Satellite Name", "Miss (km)", "Time of Closest Approach (UTC)")
+    header_debris = "{:>2s} {:>9s} {:10s} {:25s} {}  {}".format("No", "NORAD", "INTER", "Satellite Name (debris)", "Miss (km)", "Time of Closest Approach (UTC)")
+    row = "{:2d} {:9d} {:10s} {:25s} {:9.0f}  {}"
+    active_list = [row.format(n, *i) for n, i in enumerate(result.closest(n_reported, debris = False), 1)]
+    deb_list = [row.format(n, *i) for n, i in enumerate(result.closest(n_reported, debris = True), 1)]
+
+    print(header_active)
+    print('\n'.join(active_list))
+
+    print("\n" + header_debris)
+    print('\n'.join(deb_list))
+
+    if result.samples_km is not None:
+        # Report distribution of the miss distance over sampled asteroid trajectories
+        idx = result.top_k(n_reported)
+        q = result.sample_quantiles([0.05, 0.5, 0.95], idx)
+        print("\n{:>2s} {:>9s} {:25s} {:>9s} {:>9s} {:>9s} {:>9s}".format("No", "NORAD", "Satellite Name", "Miss (km)", "5%", "50%", "95%"))
+        for n, i in enumerate(idx):
+            print("{:2d} {:9d} {:25s} {:9.0f} {:9.0f} {:9.0f} {:9.0f}".format(
+                  n + 1, result.satnum[i], result.names[i], result.miss_km[i], *q[:, n]))
+        
+def make_html_output(result,target_name,filename):
+    # Report closest misses
+    html_head = '<html>\n<head>\n<title>{} conjunctions</title>\n'.format(target_name)
+    html_head +='  <link rel="stylesheet" href="styles.css">\n</head>'
+
+    table_tag_active = "<table>\n<caption> Close Approaches with non-debris for {} </caption>\n".format(target_name)
+    table_tag_debris = "<table>\n<caption> Close Approaches with debris for {} </caption>\n".format(target_name)
+    header_row = "<tr> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th>  <th>{}</th> </tr>\n".format("No", "NORAD", "INTER", "Satellite Name", "Miss (km)", "Time of Closest Approach (UTC)")
+    row = "<tr> <td>{:d}</td> <td>{:d}</td> <td>{}</td> <td>{}</td> <td>{:.0f}</td> <td>{}</td> </tr>"
+    active_list = [row.format(n, *i) for n, i in enumerate(result.closest(n_reported, debris = False), 1)]
+    deb_list = [row.format(n, *i) for n, i in enumerate(result.closest(n_reported, debris = True), 1)]
+
+    if result.samples_km is not None:
+        # Distribution of the miss distance over sampled asteroid trajectories
+        table_tag_samples = "<table>\n<caption> Miss distance over {} sampled trajectories of {} </caption>\n".format(len(result.samples_km), target_name)
+        header_samples = "<tr> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th> <th>{}</th> </tr>\n".format("No", "NORAD", "Satellite Name", "Miss (km)", "5% (km)", "50% (km)", "95% (km)")
+        idx = result.top_k(n_reported)
+        q = result.sample_quantiles([0.05, 0.5, 0.95], idx)
+        sample_list = ["<tr> <td>{:d}</td> <td>{:d}</td> <td>{}</td> <td>{:.0f}</td> <td>{:.0f}</td> <td>{:.0f}</td> <td>{:.0f}</td> </tr>".format(
+                       n + 1, result.satnum[i], result.names[i], result.miss_km[i], *q[:, n]) for n, i in enumerate(idx)]
+
+    with open(filename, "w") as f:
+        f.write(html_head)
+        f.write(table_tag_active)
+        f.write(header_row)
+        f.write('\n'.join(active_list))
+        f.write('\n</table>\n')
+
+        f.write(table_tag_debris)
+        f.write(header_row)
+        f.write('\n'.join(deb_list))
+        f.write('\n</table>\n')
+
+        if result.samples_km is not None:
+            f.write(table_tag_samples)
+            f.write(header_samples)
+            f.write('\n'.join(sample_list))
+            f.write('\n</table>\n')
+        f.write('<img src="{}.png"'.format(target_name))
+        f.write('</html>\n')
+
+def make_json_output(result,target_name,filename, flyby_type):
+    (satnum, intldesg, name, miss_km, TCA) = result.closest(1)[0]
+    t=[]
+    t.append(target_name) # asteroid name
+    t.append(name) # CA sat name
+    t.append('{:.0f}'.format(miss_km)) # CA sat miss distance (km)
+    t.append(TCA[:16]) # CA sat Time of close aproach
+    t.append(flyby_type)
+    
+    with open(filename,"w") as f:
+        f.write(json.dumps(t))
+
+def make_index(base_dir):
+    html_head = '<html>\n<head>\n<title>Asteroid-Satellite Conjunction Assessment</title>\n'
+    html_head +='  <link rel="stylesheet" href="styles.css">\n</head>'
+
+    ca_list = []
+    for j in glob.glob(base_dir + "/*.json"):
+        with open(j, 'r') as jf:
+            ca_record = json.loads(jf.read())
+            # Add hyperlink
+            ca_record[0] = '<a href="{}.html">'.format(ca_record[0]) + ca_record[0] + '</a>'
+            ca_list.append(ca_record)
+    ca_list.sort(key = lambda a: a[3], reverse = True) # sort by CA date
+    
+    with open(base_dir + "/index.html",'w') as idxf:
+        idxf.write(html_head)
+        idxf.write("<body>\n<table>\n")
+        idxf.write("<tr> <th>Minor Body</th> <th>Satellite</th> <th>Miss (km)</th> <th>Time of Closest Approach (UTC)</th> <th> Flyby Type </th> </tr>\n")
+        for ca in ca_list:
+            row = ''.join(['<td>{}</td>'.format(i) for i in ca])
+            row = '<tr>' + row + '</tr>\n'
+            idxf.write(row)
+        idxf.write("</table>\n")
+        idxf.write("<div>Last Updated: {} UTC</div>".format(datetime.datetime.utcnow().isoformat()))
+        idxf.write("</body>\n")
+        idxf.write("</html>\n")
+            
+def make_plots(target_name, result, filename, sat_r = None, target_fine = None, plot_3d = False, n_tracks = max_tracks):
+    import matplotlib.pyplot as plt
+
+    # Plot separations between each sat and the target
+    fig, ax = plt.subplots()
+    epochs_fine = result.epochs
+
+    # Label 5 sats that have closest misses
+    sat_to_label = result.top_k(5)
+
+    # Plot the same closest tracks whether the result is computed or loaded from a bundle
+    for i, track in zip(*result.tracks(n_tracks)):
+        if i in sat_to_label:
+            ax.plot(track, label = result.names[i])
+        else:
+            ax.plot(track)
+    # plot erth radius
+    #ax.plot([0, len(epochs_fine)],[sat_list[0].radiusearthkm,sat_list[0].radiusearthkm], '--', label = 'Re', )
+
+    # plot asteroid distance from earth center:
+    #ax.plot(target_raw_fine['range'] << u.km, label = target_name + " range from Earth center" )
+
+    ax.set_yscale('log')
+    ax.set_xlabel('Time [UTC]')
+    ax.set_ylabel('Miss Distance [km]')
+    ax.set_title("Miss distance sat - {}".format(target_name))
+    ax.set_xticks(range(0,len(epochs_fine),10),
+                 labels = [epochs_fine.iso[i][0:16] for i in range(0,len(epochs_fine),10)], rotation = 90, minor = False)
+    ax.legend(bbox_to_anchor=(1.05, 1),loc='upper left',)
+    plt.savefig(filename, format='png', transparent = True, bbox_inches = 'tight')
+    plt.close(fig)
+
+    if plot_3d:
+        from astropy import units as u
+        from astropy.coordinates import CartesianRepresentation
+        from poliastro.ephem import Ephem
+        from poliastro.frames import Planes
+        from poliastro.bodies import Earth
+        from poliastro.plotting import OrbitPlotter3D
+
+        plotter = OrbitPlotter3D()
+        plotter.set_attractor(Earth)
+
+        for i in sat_to_label:
+            i_ephem = Ephem(CartesianRepresentation(sat_r[i] << u.km, xyz_axis=-1), epochs_fine, plane=Planes.EARTH_EQUATOR)
+            plotter.plot_ephem(
+                i_ephem, color="#666", label=result.names[i], trail=True
+            )
+
+        plotter.plot_ephem(target_fine, color = "#345", label = target_name, trail = True)
+        plotter.show()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Author: Roman Tolesnikov
+
+Re-render HTML, JSON and plot outputs from result bundles saved by conjunction_sat_asteroid.py,
+without querying Horizons or propagating the catalog.
+
+Usage:
+    python rerender.py [--results-dir DIR] [--base-dir DIR] [--jobs N] [name ...]
+Inputs:
+    name: minor body designation in the form '2023 BU'. All bundles in the results directory are re-rendered if omitted
+"""
+
+import os, glob, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+
+from screening import MissDistances
+from outputs import make_html_output, make_json_output, make_plots, make_index
+
+
+def rerender(bundle_fn, base_dir):
+    '''Re-render all outputs of the flyby stored in bundle_fn. Return the target name'''
+    result, metadata = MissDistances.load(bundle_fn)
+    target_name = metadata['target_name']
+    make_html_output(result, target_name, base_dir + '/{}.html'.format(target_name))
+    make_json_output(result, target_name, base_dir + '/{}.json'.format(target_name), metadata['flyby_type'])
+    make_plots(target_name, result, base_dir + '/{}.png'.format(target_name))
+    return target_name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('names', nargs='*', help='flybys to re-render, default all')
+    parser.add_argument('--results-dir', default='../results', help='directory of result bundles')
+    parser.add_argument('--base-dir', default='../docs', help='output directory')
+    parser.add_argument('--jobs', type=int, default=None, help='number of worker processes, default CPU count')
+    args = parser.parse_args(argv)
+
+    if args.names:
+        bundles = [os.path.join(args.results_dir, '{}.npz'.format(n)) for n in args.names]
+    else:
+        bundles = sorted(glob.glob(os.path.join(args.results_dir, '*.npz')))
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(rerender, b, args.base_dir) for b in bundles]
+        for (b, f) in zip(bundles, futures):
+            try:
+                print("Rendered " + f.result())
+            except Exception as e:
+                # A broken bundle must not stop the others or the index
+                print("Failed {}: {!r}".format(b, e))
+    make_index(args.base_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+"""
+Author: Roman Tolesnikov
+
+Range reduction and ranking of screened satellites against an asteroid.
+
+Usage:
+    result = MissDistances.from_ranges(satnum, intldesg, names, range_km, epochs)
+    for (satnum, intldesg, name, miss_km, tca) in result.closest(n_reported, debris=False):
+        ...
+    d_km = sampled_dispersions(r0, v0, dt_s, sample_state_offsets(n_samples, sigma_r=1000, sigma_v=0.01))
+    samples_km = sampled_miss_distances(rel_r, d_km)
+    result.refine(idx, range_km_64) for idx = result.candidates(n_reported), after screening with float32 range_km
+    result.save(filename, target_name=.., flyby_type=..)
+    (result, metadata) = MissDistances.load(filename)
+Inputs:
+    satnum, intldesg, names: per-object catalog number, international designator and name
+    range_km: (N, T) array of sat-asteroid ranges, km, sampled at epochs
+    epochs: astropy Time array of length T
+    rel_r: (N, T, 3) array of satellite positions relative to the nominal asteroid position, km
+    r0, v0: nominal geocentric asteroid position (km) and velocity (km/s) at the epoch at which the state is dispersed
+    dt_s: (T,) array of time since that epoch, s
+Notes:
+    Only the handful of closest objects is ever reported, so the closest objects are selected
+    with np.argpartition (O(N)) and only the selection is sorted. The full ranking is built on first use.
+    Each sampled asteroid state is propagated with a two-body Earth model, and its difference from the two-body
+    propagation of the nominal state is added to the nominal (Horizons) trajectory. Propagation costs M x T,
+    all samples are evaluated against a single satellite propagation, and only the range reduction grows as M x N x T.
+    For reduced precision screening, ranges of all objects are computed in float32 (accurate to well below 1 km),
+    and only the candidates for the reported closest objects are recomputed from float64 positions and refined.
+    Saved results keep the per-object miss distances and the range tracks of the closest objects only,
+    which is all that is needed to re-render the outputs.
+
+  $ pip install numpy
+"""
+
+import os, json
+
+import numpy as np
+
+# Earth gravitational parameter, km^3/s^2
+GM_earth = 398_600.4418
+# Number of range tracks of the closest objects that are plotted and saved
+max_tracks = 500
+# Number of closest active satellites, debris and sampled objects that are reported
+n_reported = 20
+
+
+def is_debris(name):
+    '''Return True if the catalog name designates debris, a rocket body or an unidentified object'''
+    return (name.endswith('DEB') or name.endswith('AKM') or ' DEB ' in name or 'R/B' in name or 'PKM' in name
+            or name.startswith('WESTFORD NEEDLES') or name == 'TBA - TO BE ASSIGNED')
+
+
+def top_k(values, k, idx=None):
+    '''Return indices of the k smallest values, ordered by value.
+       idx: optional array of candidate indices to select from
+    '''
+    if idx is None:
+        idx = np.arange(len(values))
+    if k <= 0 or len(idx) == 0:
+        return idx[:0]
+    if k < len(idx):
+        idx = idx[np.argpartition(values[idx], k - 1)[:k]]
+    return idx[np.argsort(values[idx], kind='stable')]
+
+
+def sample_state_offsets(n_samples, cov=None, sigma_r=0.0, sigma_v=0.0, seed=None):
+    '''Return (n_samples, 6) asteroid position (km) and velocity (km/s) offsets drawn from a zero-mean normal distribution.
+       cov: 6x6 position/velocity covariance in km and km/s. If not given, use isotropic sigma_r (km) and sigma_v (km/s)
+    '''
+    if cov is None:
+        if sigma_r < 0 or sigma_v < 0:
+            raise ValueError("Dispersions must not be negative, got sigma_r={}, sigma_v={}".format(sigma_r, sigma_v))
+        if sigma_r == 0 and sigma_v == 0:
+            raise ValueError("Specify state covariance or a positive sigma_r or sigma_v")
+        cov = np.diag([sigma_r ** 2] * 3 + [sigma_v ** 2] * 3)
+    cov = np.asarray(cov, dtype=float)
+    if cov.shape != (6, 6):
+        raise ValueError("State covariance must be 6x6, got {}".format(cov.shape))
+    rng = np.random.default_rng(seed)
+    return rng.multivariate_normal(np.zeros(6), cov, size=n_samples, method='eigh')
+
+
+def _stumpff(z):
+    '''Return Stumpff functions C(z), S(z) for an array z'''
+    c = np.empty_like(z)
+    st = np.empty_like(z)
+    # Series near z = 0, where the closed forms lose precision
+    small = np.abs(z) < 1e-3
+    zs = z[small]
+    c[small] = 1 / 2 - zs / 24 + zs ** 2 / 720
+    st[small] = 1 / 6 - zs / 120 + zs ** 2 / 5040
+    pos = z >= 1e-3
+    sz = np.sqrt(z[pos])
+    c[pos] = (1 - np.cos(sz)) / z[pos]
+    st[pos] = (sz - np.sin(sz)) / sz ** 3
+    neg = z <= -1e-3
+    sz = np.sqrt(-z[neg])
+    c[neg] = (np.cosh(sz) - 1) / -z[neg]
+    st[neg] = (np.sinh(sz) - sz) / sz ** 3
+    return c, st
+
+
+def two_body_positions(r0, v0, dt_s, mu=GM_earth, tol=1e-10, max_iter=50):
+    '''Return (..., T, 3) positions, km, propagated with two-body dynamics from states r0, v0 for dt_s.
+       r0, v0: (..., 3) positions (km) and velocities (km/s), any conic
+       dt_s: (T,) time since the epoch of r0, v0, s
+    '''
+    r0 = np.asarray(r0, dtype=float)[..., None, :]
+    v0 = np.asarray(v0, dtype=float)[..., None, :]
+    dt = np.broadcast_to(np.asarray(dt_s, dtype=float), r0.shape[:-2] + (len(dt_s),))
+    r0n = np.linalg.norm(r0, axis=-1)
+    vr0 = np.sum(r0 * v0, axis=-1) / r0n
+    alpha = 2 / r0n - np.sum(v0 * v0, axis=-1) / mu
+    sqrt_mu = np.sqrt(mu)
+    # Solve the universal Kepler equation for the universal anomaly chi with Newton's method
+    chi = sqrt_mu * dt / r0n
+    for _ in range(max_iter):
+        z = alpha * chi ** 2
+        c, st = _stumpff(z)
+        f = r0n * vr0 / sqrt_mu * chi ** 2 * c + (1 - alpha * r0n) * chi ** 3 * st + r0n * chi - sqrt_mu * dt
+        df = r0n * vr0 / sqrt_mu * chi * (1 - z * st) + (1 - alpha * r0n) * chi ** 2 * c + r0n
+        step = f / df
+        chi = chi - step
+        if np.all(np.abs(step) <= tol * np.maximum(np.abs(chi), 1)):
+            break
+    z = alpha * chi ** 2
+    c, st = _stumpff(z)
+    # Lagrange coefficients
+    lf = 1 - chi ** 2 / r0n * c
+    lg = dt - chi ** 3 / sqrt_mu * st
+    return lf[..., None] * r0 + lg[..., None] * v0
+
+
+def sampled_dispersions(r0, v0, dt_s, offsets, mu=GM_earth):
+    '''Return (M, T, 3) displacement, km, of M sampled asteroid trajectories from the nominal one.
+       r0, v0: nominal geocentric asteroid position (km) and velocity (km/s)
+       dt_s: (T,) time since the epoch of r0, v0, s
+       offsets: (M, 6) asteroid position and velocity offsets, km and km/s
+    '''
+    nominal = two_body_positions(r0, v0, dt_s, mu)
+    return two_body_positions(r0 + offsets[:, :3], v0 + offsets[:, 3:], dt_s, mu) - nominal
+
+
+def sampled_miss_distances(rel_r, d_km, max_elements=1 << 24):
+    '''Return (M, N) miss distances, km, for each of the M sampled asteroid trajectories and N satellites.
+       rel_r: (N, T, 3) satellite positions relative to the nominal asteroid, km
+       d_km: (M, T, 3) displacement of the sampled asteroid trajectories from the nominal one, km
+       max_elements: bound on the size of the (samples, N, T) range array evaluated at once
+    '''
+    n_sat, n_epoch = rel_r.shape[:2]
+    # |R - D|^2 = |R|^2 - 2 R.D + |D|^2
+    rel_sq = np.einsum('ntk,ntk->nt', rel_r, rel_r, dtype=np.float64)
+    chunk = max(1, max_elements // (n_sat * n_epoch))
+    miss_km = np.empty((len(d_km), n_sat))
+    for start in range(0, len(d_km), chunk):
+        d = d_km[start:start + chunk]
+        range_sq = rel_sq[None] - 2 * np.einsum('ntk,mtk->mnt', rel_r, d) + np.einsum('mtk,mtk->mt', d, d)[:, None, :]
+        miss_km[start:start + chunk] = np.sqrt(np.maximum(range_sq.min(axis=2), 0))
+    return miss_km
+
+
+class MissDistances:
+    '''Closest approach of every screened object to the target'''
+
+    def __init__(self, satnum, intldesg, names, miss_km, tca_idx, epochs, tracks_km, track_idx, samples_km=None):
+        self.satnum = np.asarray(satnum)
+        self.intldesg = np.asarray(intldesg)
+        self.names = np.asarray(names)
+        self.miss_km = np.asarray(miss_km)
+        # Index of the closest approach for each object
+        self.tca_idx = np.asarray(tca_idx)
+        self.epochs = epochs
+        # Ranges of objects track_idx at all epochs
+        self.tracks_km = tracks_km
+        self.track_idx = np.asarray(track_idx)
+        # (M, N) miss distances for sampled asteroid trajectories, if computed
+        self.samples_km = samples_km
+        self._debris = None
+        self._ranked = None
+
+    @classmethod
+    def from_ranges(cls, satnum, intldesg, names, range_km, epochs):
+        '''Build from (N, T) array of ranges of all objects'''
+        tca_idx = np.argmin(range_km, axis=1)
+        miss_km = np.take_along_axis(range_km, tca_idx[:, None], axis=1)[:, 0].astype(np.float64)
+        return cls(satnum, intldesg, names, miss_km, tca_idx, epochs, range_km, np.arange(len(miss_km)))
+
+    def tracks(self, k=max_tracks):
+        '''Return indices, in catalog order, and (len(idx), T) range tracks of the k closest objects with tracks'''
+        idx = np.sort(top_k(self.miss_km, k, self.track_idx))
+        return idx, self.tracks_km[np.searchsorted(self.track_idx, idx)]
+
+    def save(self, filename, n_tracks=max_tracks, **metadata):
+        '''Save to a compressed .npz bundle with range tracks of the n_tracks closest objects and metadata'''
+        idx, tracks_km = self.tracks(n_tracks)
+        arrays = {}
+        if self.samples_km is not None:
+            arrays['samples_km'] = self.samples_km.astype(np.float32)
+        epochs = self.epochs.utc
+        # Write to a temporary file first, so an interrupted save does not leave a truncated bundle
+        tmp_fn = filename + '.tmp'
+        with open(tmp_fn, 'wb') as fp:
+            np.savez_compressed(fp,
+                                satnum=self.satnum, intldesg=self.intldesg, names=self.names,
+                                miss_km=self.miss_km, tca_idx=self.tca_idx,
+                                epochs_jd1=epochs.jd1, epochs_jd2=epochs.jd2,
+                                tracks_km=tracks_km.astype(np.float32), track_idx=idx,
+                                metadata=json.dumps(metadata), **arrays)
+        os.replace(tmp_fn, filename)
+
+    @classmethod
+    def load(cls, filename):
+        '''Load a bundle written by save. Return (MissDistances, metadata)'''
+        from astropy.time import Time
+
+        with np.load(filename) as d:
+            track_order = np.argsort(d['track_idx'])
+            result = cls(d['satnum'], d['intldesg'], d['names'], d['miss_km'], d['tca_idx'],
+                         Time(d['epochs_jd1'], d['epochs_jd2'], format='jd', scale='utc'),
+                         d['tracks_km'][track_order], d['track_idx'][track_order],
+                         d['samples_km'] if 'samples_km' in d else None)
+            metadata = json.loads(str(d['metadata']))
+        return result, metadata
+
+    def __len__(self):
+        return len(self.miss_km)
+
+    @property
+    def debris(self):
+        '''Boolean mask of objects classified as debris'''
+        if self._debris is None:
+            self._debris = np.fromiter((is_debris(n) for n in self.names), dtype=bool, count=len(self.names))
+        return self._debris
+
+    def top_k(self, k, debris=None):
+        '''Indices of the k closest objects, ordered by miss distance.
+           debris: None for all objects, True for debris only, False for non-debris only
+        '''
+        if debris is None:
+            return top_k(self.miss_km, k)
+        return top_k(self.miss_km, k, np.flatnonzero(self.debris == debris))
+
+    def candidates(self, k, tol_km=1.0):
+        '''Indices of objects that can be among the k closest of their class, debris or not,
+           when miss distances are accurate to tol_km
+        '''
+        idx = []
+        for debris in (False, True):
+            members = np.flatnonzero(self.debris == debris)
+            if len(members) > k:
+                kth = np.partition(self.miss_km[members], k - 1)[k - 1]
+                members = members[self.miss_km[members] <= kth + 2 * tol_km]
+            idx.append(members)
+        return np.sort(np.concatenate(idx))
+
+    def refine(self, idx, range_km):
+        '''Replace ranges of objects idx with more accurate (len(idx), T) range_km'''
+        tca_idx = np.argmin(range_km, axis=1)
+        self.tca_idx[idx] = tca_idx
+        self.miss_km[idx] = np.take_along_axis(range_km, tca_idx[:, None], axis=1)[:, 0]
+        self.tracks_km[np.searchsorted(self.track_idx, idx)] = range_km
+        self._ranked = None
+
+    def sample_quantiles(self, q, idx):
+        '''Return (len(q), len(idx)) quantiles of the sampled miss distances of objects idx'''
+        return np.quantile(self.samples_km[:, idx], q, axis=0)
+
+    def tca(self, i):
+        '''Time of the closest approach of object i as an ISO string'''
+        return self.epochs[self.tca_idx[i]].iso
+
+    def _row(self, i):
+        return (int(self.satnum[i]), str(self.intldesg[i]), str(self.names[i]), float(self.miss_km[i]), self.tca(i))
+
+    def closest(self, k, debris=None):
+        '''Return list of (satnum, intldesg, name, miss_km, tca) for the k closest objects'''
+        return [self._row(i) for i in self.top_k(k, debris)]
+
+    def ranked(self):
+        '''Iterate over (satnum, intldesg, name, miss_km, tca) of all objects ordered by miss distance.
+           The full sort is done on first use only
+        '''
+        if self._ranked is None:
+            self._ranked = np.argsort(self.miss_km, kind='stable')
+        for i in self._ranked:
+            yield self._row(i)
+
+
+if __name__ == '__main__':
+    from astropy import units as u
+    from astropy.time import Time
+
+    rng = np.random.default_rng(0)
+    n_sat, n_epoch = 2000, 200
+    epochs = Time('2023-01-27') + np.arange(n_epoch) * u.min
+    names = ['OGO 5 DEB' if i % 3 == 0 else 'SAT {}'.format(i) for i in range(n_sat)]
+    # Satellites from LEO to beyond GEO, asteroid passing from lunar distance to within GEO
+    sat_r = rng.normal(size=(n_sat, n_epoch, 3))
+    sat_r *= rng.uniform(7_000, 50_000, size=(n_sat, 1, 1)) / np.linalg.norm(sat_r, axis=-1, keepdims=True)
+    target_r = np.linspace([380_000, 20_000, 0], [-20_000, 20_000, 1_000], n_epoch)
+    range_64 = np.linalg.norm(sat_r - target_r, axis=-1)
+
+    # Partial selection of the closest objects agrees with the full ranking
+    assert list(top_k(np.array([3.0, 1.0, 2.0]), 2)) == [1, 2]
+    assert list(top_k(np.array([3.0, 1.0, 2.0]), 5)) == [1, 2, 0]
+    assert len(top_k(np.array([3.0, 1.0, 2.0]), 0)) == 0
+    result_64 = MissDistances.from_ranges(np.arange(n_sat), ['']*n_sat, names, range_64, epochs)
+    ranked = list(result_64.ranked())
+    assert [i[0] for i in ranked] == list(np.argsort(range_64.min(axis=1)))
+    assert ranked[:20] == result_64.closest(20)
+    for debris in (False, True):
+        assert result_64.closest(20, debris) == [i for i in ranked if is_debris(i[2]) == debris][:20]
+    assert result_64.tca(ranked[0][0]) == epochs[np.argmin(range_64[ranked[0][0]])].iso
+
+    # Bundles keep the reported closest objects, sampled miss distances, the closest tracks and metadata
+    import tempfile
+    result_64.samples_km = rng.uniform(0, 1e5, size=(5, n_sat))
+    with tempfile.TemporaryDirectory() as d:
+        fn = os.path.join(d, '2023 BU.npz')
+        result_64.save(fn, n_tracks=50, target_name='2023 BU', flyby_type='recent')
+        assert os.listdir(d) == ['2023 BU.npz']
+        loaded, metadata = MissDistances.load(fn)
+    assert metadata == {'target_name': '2023 BU', 'flyby_type': 'recent'}
+    for debris in (False, True):
+        assert loaded.closest(n_reported, debris) == result_64.closest(n_reported, debris)
+    assert np.allclose(loaded.samples_km, result_64.samples_km)
+    idx, tracks = loaded.tracks()
+    assert (idx == result_64.tracks(50)[0]).all() and np.allclose(tracks, result_64.tracks(50)[1])
+    result_64.samples_km = None
+
+    # Reduced precision screening is accurate to well below the reported 1 km
+    range_32 = np.linalg.norm(sat_r.astype(np.float32) - target_r.astype(np.float32), axis=-1)
+    result = MissDistances.from_ranges(np.arange(n_sat), ['']*n_sat, names, range_32, epochs)
+    assert np.abs(result.miss_km - result_64.miss_km).max() < 0.1
+    # and gives the same closest objects in float64 after refinement
+    idx = result.candidates(n_reported)
+    result.refine(idx, range_64[idx])
+    for debris in (False, True):
+        assert result.closest(n_reported, debris) == result_64.closest(n_reported, debris)
+
+    # Two-body propagation agrees with numerical integration for a hyperbolic flyby inside GEO
+    def rk4(r, v, dt_s, h=5.0):
+        acc = lambda r: -GM_earth * r / np.linalg.norm(r) ** 3
+        out = [r]
+        for _ in range(int(round(dt_s[-1] / h))):
+            k1v, k1r = acc(r), v
+            k2v, k2r = acc(r + h / 2 * k1r), v + h / 2 * k1v
+            k3v, k3r = acc(r + h / 2 * k2r), v + h / 2 * k2v
+            k4v, k4r = acc(r + h * k3r), v + h * k3v
+            r, v = r + h / 6 * (k1r + 2 * k2r + 2 * k3r + k4r), v + h / 6 * (k1v + 2 * k2v + 2 * k3v + k4v)
+            out.append(r)
+        return np.array(out)[::int(round((dt_s[1] - dt_s[0]) / h))]
+    r0, v0 = np.array([20_000.0, 0, 0]), np.array([0, 8.0, 1.0])
+    dt_s = np.arange(0, 7201, 60.0)
+    assert np.abs(two_body_positions(r0, v0, dt_s) - rk4(r0, v0, dt_s)).max() < 1e-3
+    assert np.abs(two_body_positions(r0, v0, -dt_s)[1] - rk4(r0, -v0, dt_s)[1]).max() < 1e-3
+    # and for an elliptical orbit over more than one revolution
+    r1, v1 = np.array([7_000.0, 0, 0]), np.array([0, 7.5, 0.5])
+    assert np.abs(two_body_positions(r1, v1, dt_s) - rk4(r1, v1, dt_s)).max() < 1e-3
+
+    # Sampled trajectories: zero offsets give the nominal one, gravity bends the dispersion off a straight line
+    for sigmas in ({}, {'sigma_r': -100}, {'sigma_r': 1000, 'sigma_v': -0.01}):
+        try:
+            sample_state_offsets(7, **sigmas)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Failed exception check")
+    offsets = sample_state_offsets(7, sigma_r=1000, sigma_v=0.01, seed=1)
+    assert np.abs(sampled_dispersions(r0, v0, dt_s, np.zeros((1, 6)))).max() < 1e-6
+    d = sampled_dispersions(r0, v0, dt_s - 3600, offsets)
+    assert np.allclose(d[:, 60], offsets[:, :3], atol=1e-6)
+    straight = offsets[:, None, :3] + offsets[:, None, 3:] * (dt_s - 3600)[:, None]
+    assert np.abs(d - straight).max() > 100
+
+    # Batched Monte Carlo ranges agree with the direct computation
+    d = sampled_dispersions(target_r[100], (target_r[101] - target_r[99]) / 120, np.arange(-100, 100) * 60.0, offsets)
+    samples = sampled_miss_distances(sat_r - target_r, d, max_elements=n_sat * n_epoch * 3)
+    assert np.allclose(samples, np.linalg.norm(sat_r - target_r - d[:, None], axis=-1).min(axis=2))
+    print("PASS!")